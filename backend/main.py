@@ -24,6 +24,9 @@ from models.api_models import ErrorResponse
 # Async DB Manager
 from utils.database.database import get_db_manager
 
+# Response cache
+from utils.appwide.response_cache import init_response_cache
+
 
 # ---------------------------------------------------------
 # ✅ ENVIRONMENT SETUP
@@ -125,6 +128,9 @@ async def startup_event():
     await db.connect()
     logger.info("✅ Database connected")
 
+    # Per-user response cache (device listings etc.)
+    init_response_cache()
+
     # Initialize JWT manager, cleanup scheduler, etc.
     initialize_app()
     logger.info("✅ App helpers initialized")
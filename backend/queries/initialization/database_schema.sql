@@ -237,6 +237,17 @@ CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens (expires
 
 CREATE INDEX IF NOT EXISTS idx_user_devices_expires ON user_devices (expires_at);
 
+-- Composite indexes matching the PostgreSQLStorage predicates
+-- (token_blacklist.jti is already covered by its primary key)
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_created ON refresh_tokens (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_device ON refresh_tokens (user_id, device_fp);
+CREATE INDEX IF NOT EXISTS idx_user_devices_user_expires ON user_devices (user_id, expires_at);
+
+-- Refresh planner statistics so the new indexes are picked up immediately
+ANALYZE token_blacklist;
+ANALYZE refresh_tokens;
+ANALYZE user_devices;
+
 -- If you want non-blocking index creation in production, run these instead (outside transactions):
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_token_blacklist_user_id ON token_blacklist (user_id);
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_token_blacklist_expires ON token_blacklist (expires_at);
@@ -244,6 +255,9 @@ CREATE INDEX IF NOT EXISTS idx_user_devices_expires ON user_devices (expires_at)
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_refresh_tokens_device_fp ON refresh_tokens (device_fp);
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens (expires_at);
 -- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_devices_expires ON user_devices (expires_at);
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_refresh_tokens_user_created ON refresh_tokens (user_id, created_at DESC);
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_refresh_tokens_user_device ON refresh_tokens (user_id, device_fp);
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_devices_user_expires ON user_devices (user_id, expires_at);
 
 -- Create cleanup function
 CREATE OR REPLACE FUNCTION cleanup_expired_tokens()
@@ -263,3 +277,220 @@ CREATE TABLE system_entities (
     description TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+
+-- =============================================
+-- EFFECTIVE PERMISSIONS (materialized view)
+-- =============================================
+-- One row per (user, structure:action) the user is granted through any of
+-- their active roles. Permission checks read this with a single indexed lookup
+-- instead of walking user_roles -> roles -> role_permissions -> granted_actions.
+-- Only active assignments, active roles and active grants count.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_effective_permissions AS
+SELECT DISTINCT
+    ur.user_id,
+    (rp.structure_id::text || ':' || action_val) AS permission_id
+FROM user_roles ur
+JOIN roles r ON r.role_id = ur.role_id AND r.is_active
+JOIN role_permissions rp ON rp.role_id = ur.role_id
+CROSS JOIN LATERAL jsonb_array_elements_text(rp.granted_actions) AS action_val
+WHERE ur.status = 'AC'
+  AND rp.status = 'AC';
+
+-- Unique index is required for REFRESH ... CONCURRENTLY; user_id is the leading column
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_effective_permissions_user_perm
+    ON user_effective_permissions (user_id, permission_id);
+
+-- Deferred to commit and flagged per transaction, so a transaction that
+-- touches many rows (e.g. saving a role's permissions) refreshes once
+CREATE OR REPLACE FUNCTION refresh_user_effective_permissions()
+RETURNS trigger AS $$
+BEGIN
+    IF current_setting('svau.effective_permissions_refreshed', true) IS DISTINCT FROM 'on' THEN
+        -- is_local = true: the flag resets when the transaction ends
+        PERFORM set_config('svau.effective_permissions_refreshed', 'on', true);
+        REFRESH MATERIALIZED VIEW CONCURRENTLY user_effective_permissions;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER trg_user_roles_refresh_effective_permissions
+AFTER INSERT OR UPDATE OR DELETE ON user_roles
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW
+EXECUTE FUNCTION refresh_user_effective_permissions();
+
+CREATE CONSTRAINT TRIGGER trg_role_permissions_refresh_effective_permissions
+AFTER INSERT OR UPDATE OR DELETE ON role_permissions
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW
+EXECUTE FUNCTION refresh_user_effective_permissions();
+
+CREATE CONSTRAINT TRIGGER trg_roles_refresh_effective_permissions
+AFTER INSERT OR UPDATE OR DELETE ON roles
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW
+EXECUTE FUNCTION refresh_user_effective_permissions();
+
+
+-- =============================================
+-- QUERY USAGE STATISTICS (QueryManager analytics)
+-- =============================================
+-- Append-only log written in batches by DatabaseStatsLogger.
+-- Range-partitioned by day: time-window scans only touch the matching
+-- partitions and retention is a DROP TABLE instead of DELETE + VACUUM.
+
+CREATE TABLE IF NOT EXISTS query_usage_stats (
+    id BIGSERIAL,
+    timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    category VARCHAR(50) NOT NULL,
+    query_name VARCHAR(100) NOT NULL,
+    cache_hit BOOLEAN NOT NULL,
+    response_time_ms DOUBLE PRECISION NOT NULL,
+    user_id INTEGER,
+    endpoint VARCHAR(255),
+    application_version VARCHAR(50),
+    -- The partition key must be part of the primary key
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Catches rows outside the pre-created daily partitions
+CREATE TABLE IF NOT EXISTS query_usage_stats_default PARTITION OF query_usage_stats DEFAULT;
+
+-- Time-window (optionally per-category) scans over the raw log, e.g. ad-hoc
+-- drill-downs; covering columns allow index-only scans. Created on every partition.
+CREATE INDEX IF NOT EXISTS idx_query_usage_stats_ts_category
+    ON query_usage_stats (timestamp DESC, category)
+    INCLUDE (query_name, cache_hit, response_time_ms);
+
+-- Create daily partitions from today through days_ahead. Rows for a day that
+-- already landed in the default partition are moved into the new partition
+-- (CREATE ... PARTITION OF refuses while the default holds matching rows),
+-- and a failure on one day is reported without aborting the remaining days.
+CREATE OR REPLACE FUNCTION ensure_query_usage_partitions(days_ahead INTEGER DEFAULT 7)
+RETURNS void AS $$
+DECLARE
+    d DATE;
+    part_name TEXT;
+BEGIN
+    FOR d IN
+        SELECT generate_series(CURRENT_DATE, CURRENT_DATE + days_ahead, INTERVAL '1 day')::date
+    LOOP
+        part_name := 'query_usage_stats_' || to_char(d, 'YYYYMMDD');
+        CONTINUE WHEN to_regclass(part_name) IS NOT NULL;
+
+        BEGIN
+            CREATE TEMP TABLE IF NOT EXISTS query_usage_stats_moving
+                (LIKE query_usage_stats) ON COMMIT DROP;
+
+            WITH moved AS (
+                DELETE FROM query_usage_stats_default
+                WHERE timestamp >= d AND timestamp < d + 1
+                RETURNING *
+            )
+            INSERT INTO query_usage_stats_moving SELECT * FROM moved;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF query_usage_stats FOR VALUES FROM (%L) TO (%L)',
+                part_name, d, d + 1
+            );
+
+            INSERT INTO query_usage_stats SELECT * FROM query_usage_stats_moving;
+            TRUNCATE query_usage_stats_moving;
+        EXCEPTION WHEN OTHERS THEN
+            -- The sub-transaction rolls back, so moved rows return to the default
+            RAISE WARNING 'Could not create partition %: %', part_name, SQLERRM;
+        END;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Retention: drop daily partitions older than retain_days, and delete
+-- expired rows that fell into the default partition
+CREATE OR REPLACE FUNCTION drop_old_query_usage_partitions(retain_days INTEGER DEFAULT 365)
+RETURNS void AS $$
+DECLARE
+    part RECORD;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'query_usage_stats'
+          AND c.relname ~ '^query_usage_stats_[0-9]{8}$'
+          AND to_date(right(c.relname, 8), 'YYYYMMDD') < CURRENT_DATE - retain_days
+    LOOP
+        EXECUTE format('DROP TABLE IF EXISTS %I', part.relname);
+    END LOOP;
+
+    DELETE FROM query_usage_stats_default
+    WHERE timestamp < CURRENT_DATE - retain_days;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_query_usage_partitions();
+
+-- Daily rollup the analytics endpoints read instead of scanning raw rows.
+-- Sums (not averages) are stored so any date range can be re-aggregated exactly.
+-- (day, category) lead the primary key for range filters.
+CREATE TABLE IF NOT EXISTS query_usage_daily (
+    day DATE NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    query_name VARCHAR(100) NOT NULL,
+    call_count BIGINT NOT NULL,
+    cache_hits BIGINT NOT NULL,
+    total_ms DOUBLE PRECISION NOT NULL,
+    min_ms DOUBLE PRECISION NOT NULL,
+    max_ms DOUBLE PRECISION NOT NULL,
+    p95_ms DOUBLE PRECISION NOT NULL,
+    slow_count BIGINT NOT NULL,
+    slow_total_ms DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (day, category, query_name)
+);
+
+-- Incremental refresh: re-aggregate only the last days_back days plus today
+-- (partition pruning keeps the scan to those partitions) and upsert them.
+-- Older days are final. Whole days are recomputed because p95 isn't additive.
+-- Run with a larger days_back once to backfill.
+CREATE OR REPLACE FUNCTION rollup_query_usage_daily(days_back INTEGER DEFAULT 1)
+RETURNS void AS $$
+BEGIN
+    INSERT INTO query_usage_daily AS d (
+        day, category, query_name, call_count, cache_hits, total_ms,
+        min_ms, max_ms, p95_ms, slow_count, slow_total_ms
+    )
+    SELECT
+        date_trunc('day', timestamp)::date,
+        category,
+        query_name,
+        COUNT(*),
+        SUM(cache_hit::int),
+        SUM(response_time_ms),
+        MIN(response_time_ms),
+        MAX(response_time_ms),
+        -- Returns an observed value rather than an interpolated one. It still
+        -- sorts each (day, query) group like PERCENTILE_CONT; the sort is
+        -- kept cheap by rolling up only the last two days per run
+        PERCENTILE_DISC(0.95) WITHIN GROUP (ORDER BY response_time_ms),
+        COUNT(*) FILTER (WHERE response_time_ms > 100),
+        COALESCE(SUM(response_time_ms) FILTER (WHERE response_time_ms > 100), 0)
+    FROM query_usage_stats
+    WHERE timestamp >= CURRENT_DATE - days_back
+    GROUP BY 1, 2, 3
+    ON CONFLICT (day, category, query_name) DO UPDATE SET
+        call_count = EXCLUDED.call_count,
+        cache_hits = EXCLUDED.cache_hits,
+        total_ms = EXCLUDED.total_ms,
+        min_ms = EXCLUDED.min_ms,
+        max_ms = EXCLUDED.max_ms,
+        p95_ms = EXCLUDED.p95_ms,
+        slow_count = EXCLUDED.slow_count,
+        slow_total_ms = EXCLUDED.slow_total_ms;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Called periodically by the analytics stats logger:
+-- SELECT rollup_query_usage_daily();
@@ -220,6 +220,13 @@ SELECT
     ) as permission_structure;
 """
 
+# Effective permissions come from the user_effective_permissions materialized view
+GET_USER_EFFECTIVE_PERMISSIONS = """
+SELECT permission_id
+FROM user_effective_permissions
+WHERE user_id = %(user_id)s
+"""
+
 #---------------------------------------#
 #  ROLES RELATED QUERIES - START        #
 #---------------------------------------#
@@ -426,7 +433,7 @@ DO UPDATE SET
 REMOVE_OLD_PERMISSIONS = """
 DELETE FROM role_permissions
 WHERE role_id = %(role_id)s
-  AND structure_id NOT IN %(structure_ids)s
+  AND structure_id <> ALL(%(structure_ids)s::int[])
 """
 
 # Soft delete a role (mark as inactive)
@@ -16,6 +16,8 @@ from models.auth_models import (
 )
 from utils.database.query_manager import permission_query
 from utils.appwide.rate_limiter import limiter
+from utils.appwide.response_cache import DEVICES_NAMESPACE, DEVICES_CACHE_TTL, user_key_builder
+from fastapi_cache.decorator import cache
 
 from routes.auth.services.user_service import UserService
 from routes.auth.services.organization_service import OrganizationService
@@ -384,6 +386,23 @@ async def get_current_user_info(
     return user
 
 
+# --------------------------
+# CURRENT USER DEVICES
+# --------------------------
+@router.get("/me/devices")
+@cache(expire=DEVICES_CACHE_TTL, namespace=DEVICES_NAMESPACE, key_builder=user_key_builder)
+async def get_current_user_devices(
+    current_user: AuthUser = Depends(get_current_user),
+):
+    try:
+        jwt_manager = get_jwt_manager()
+        devices = await jwt_manager.get_user_devices(str(current_user.user_id))
+        return {"devices": devices, "total_devices": len(devices)}
+    except Exception:
+        logger.exception("Device listing error")
+        raise HTTPException(500, "Failed to load devices")
+
+
 # --------------------------
 # UPDATE USER
 # --------------------------
@@ -412,7 +431,8 @@ async def update_current_user_info(
             }
         )
 
-        if not success:
+        # Status string such as "UPDATE 0" when no row matched
+        if not success or success.endswith(" 0"):
             raise HTTPException(404, "User not found")
 
         updated_user = await db.fetch_one_async(
@@ -450,7 +470,8 @@ async def delete_current_user(
             {"user_id": current_user.id}
         )
 
-        if not success:
+        # Status string such as "UPDATE 0" when no row matched
+        if not success or success.endswith(" 0"):
             raise HTTPException(404, "User not found")
 
         return SuccessResponse(success=True, message="User account deleted successfully")
@@ -1,7 +1,7 @@
 # routers/permissions_router.py
 import logging
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, FrozenSet, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
@@ -10,6 +10,7 @@ from utils.database.database_async_core import AsyncDatabaseManager
 from utils.database.query_manager import permission_query
 from utils.auth.auth_middleware import get_current_user
 #from utils.auth.permissions import require_permission_id, CommonPermissionIds, ExplicitPermissionSystem
+from utils.auth.permissions import get_current_user_permission_ids
 from utils.api.response_utils import error_response, success_response
 from utils.appwide.errors import AppException
 
@@ -55,6 +56,23 @@ async def get_permission_structure(
         )
 
 
+# --------------------------
+# CURRENT USER'S EFFECTIVE PERMISSIONS
+# --------------------------
+@router.get("/me")
+async def get_my_permissions(
+    perm_ids: FrozenSet[str] = Depends(get_current_user_permission_ids),
+):
+    """
+    Effective permission IDs ("<structure_id>:<action_key>") of the current user,
+    read from the user_effective_permissions view.
+    """
+    return success_response(
+        {"permission_ids": sorted(perm_ids), "total": len(perm_ids)},
+        "Permissions loaded",
+    )
+
+
 # ----------------------------------------------------
 # USER ENDPOINTS -- START
 # ----------------------------------------------------
@@ -1,4 +1,3 @@
-import json
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -87,28 +86,26 @@ class RoleService:
             return
 
         structure_ids: List[int] = []
-        print("update_role_permissions")
-        print(permissions)
+        rows: List[Dict[str, Any]] = []
         for perm in permissions:
-            print(perm)
             structure_id = int(perm.get("permissstruct_id"))
-            granted = json.dumps(perm.get("granted_action_key", []))
             structure_ids.append(structure_id)
+            rows.append({
+                "role_id": role_id,
+                "structure_id": structure_id,
+                "granted_actions": perm.get("granted_action_key", []),
+            })
+
+        # Upserts and removal in one transaction: the deferred trigger
+        # refreshes the effective-permissions view once, at commit
+        async with self.db.transaction_async():
+            await self.db.execute_many_async(permission_query("UPSERT_ROLE_PERMISSION"), rows)
 
             await self.db.execute_async(
-                permission_query("UPSERT_ROLE_PERMISSION"),
-                {
-                    "role_id": role_id,
-                    "structure_id": structure_id,
-                    "granted_actions": granted,
-                },
+                permission_query("REMOVE_OLD_PERMISSIONS"),
+                {"role_id": role_id, "structure_ids": structure_ids},
             )
 
-        await self.db.execute_async(
-            permission_query("REMOVE_OLD_PERMISSIONS"),
-            {"role_id": role_id, "structure_ids": tuple(structure_ids)},
-        )
-
     # ======================================================
     # READ
     # ======================================================
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Query, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from typing import Dict, Any, Optional,List
 from datetime import datetime, timedelta
 import os
 
+from apscheduler.schedulers.background import BackgroundScheduler
+from psycopg2.pool import ThreadedConnectionPool
+
 from utils.database.query_manager import query_manager, QueryManager, DatabaseStatsLogger
-from utils.database import get_db  # Your database connection function
 
 router = APIRouter(prefix="/api/analytics", tags=["Query Analytics"])
 
@@ -13,7 +16,29 @@ router = APIRouter(prefix="/api/analytics", tags=["Query Analytics"])
 def get_query_manager_with_db():
     """Get QueryManager instance with database logging enabled"""
     if not hasattr(get_query_manager_with_db, "cached_manager"):
-        stats_logger = DatabaseStatsLogger(get_db)
+        # Small dedicated pool: the stats logger runs in its own thread, outside asyncpg
+        pool = ThreadedConnectionPool(
+            1, int(os.getenv("STATS_DB_POOL_MAX", "2")), dsn=os.getenv("DATABASE_URL")
+        )
+        stats_logger = DatabaseStatsLogger(pool)
+
+        # Keep the query_usage_daily rollup that the reports read reasonably fresh
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(
+            stats_logger.refresh_daily_rollup,
+            "interval",
+            minutes=int(os.getenv("STATS_ROLLUP_REFRESH_MINUTES", "15"))
+        )
+        # Daily partitions ahead of time; old ones dropped past the retention window
+        scheduler.add_job(
+            stats_logger.maintain_partitions,
+            "interval",
+            hours=24,
+            kwargs={"retain_days": int(os.getenv("STATS_RETENTION_DAYS", "365"))},
+            next_run_time=datetime.now()
+        )
+        scheduler.start()
+
         get_query_manager_with_db.cached_manager = QueryManager(stats_logger=stats_logger)
     return get_query_manager_with_db.cached_manager
 
@@ -57,7 +82,7 @@ async def get_historical_analytics(
 ):
     """Get historical query usage analytics from database"""
     try:
-        historical_stats = qm.get_historical_stats(days=days, category=category)
+        historical_stats = await run_in_threadpool(qm.get_historical_stats, days=days, category=category)
         
         if "error" in historical_stats:
             raise HTTPException(status_code=500, detail=historical_stats["error"])
@@ -80,10 +105,10 @@ async def get_comprehensive_analytics(
     try:
         # Current session stats
         current_stats = qm.cache_stats()
-        current_usage = qm.usage_report()
+        current_usage = qm.usage_report(top_n=10)
         
         # Historical stats
-        historical_stats = qm.get_historical_stats(days=days)
+        historical_stats = await run_in_threadpool(qm.get_historical_stats, days=days)
         
         return {
             "timestamp": datetime.now().isoformat(),
@@ -91,7 +116,7 @@ async def get_comprehensive_analytics(
             "current_session": {
                 "cache_performance": current_stats,
                 "daily_usage": current_usage["daily_usage"],
-                "top_queries": dict(list(current_usage["query_usage"].items())[:10])
+                "top_queries": current_usage["query_usage"]
             },
             "historical_analysis": historical_stats,
             "recommendations": {
@@ -111,7 +136,7 @@ async def get_slow_queries(
 ):
     """Identify slow queries that need optimization"""
     try:
-        historical_stats = qm.get_historical_stats(days=days)
+        historical_stats = await run_in_threadpool(qm.get_historical_stats, days=days)
         
         slow_queries = []
         for query in historical_stats.get("top_queries", []):
@@ -160,7 +185,7 @@ async def export_usage_data(
         if format == "csv":
             filename = f"query_usage_export_{timestamp}.csv"
             filepath = f"/tmp/{filename}"
-            qm.export_usage_csv(filepath)
+            await run_in_threadpool(qm.export_usage_csv, filepath)
             
             return FileResponse(
                 filepath,
@@ -168,7 +193,7 @@ async def export_usage_data(
                 filename=filename
             )
         else:
-            historical_stats = qm.get_historical_stats(days=days)
+            historical_stats = await run_in_threadpool(qm.get_historical_stats, days=days)
             current_stats = qm.cache_stats()
             
             return {
@@ -202,7 +227,7 @@ def generate_optimization_suggestions(historical_stats: Dict[str, Any]) -> List[
     
     summary = historical_stats.get("summary", {})
     if summary.get("cache_hit_ratio", 0) < 0.7:
-        suggestions.append("Low cache hit ratio - consider increasing cache size or TTL")
+        suggestions.append("Low cache hit ratio - consider preloading frequently used query categories")
     
     if summary.get("avg_response_time_ms", 0) > 50:
         suggestions.append("High average response time - review query performance")
@@ -0,0 +1,65 @@
+# utils/appwide/response_cache.py
+import logging
+import os
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+logger = logging.getLogger(__name__)
+
+DEVICES_NAMESPACE = "devices"
+DEVICES_CACHE_TTL = 30
+
+
+def init_response_cache() -> None:
+    """
+    Initialise FastAPICache: Redis when REDIS_URL is set, so invalidation
+    reaches every worker; otherwise a per-process in-memory cache.
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        import redis.asyncio as aioredis
+        from fastapi_cache.backends.redis import RedisBackend
+
+        FastAPICache.init(RedisBackend(aioredis.from_url(redis_url)), prefix="svau-cache")
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix="svau-cache")
+
+
+def user_key_builder(func, namespace: str = "", *, request=None, response=None, args=(), kwargs=None):
+    """
+    Cache key scoped to the authenticated user.
+
+    User-specific responses must never share a key, otherwise one user's
+    data is served to another. Expects the endpoint to take `current_user`.
+    One entry per user per namespace, so each cached endpoint needs its own
+    namespace; that keeps the key computable for exact invalidation.
+    """
+    current_user = (kwargs or {}).get("current_user")
+    user_id = getattr(current_user, "user_id", None)
+    if user_id is None:
+        # A shared "None" key would leak responses across users
+        raise RuntimeError(
+            f"user_key_builder needs an authenticated `current_user` on {func.__name__}"
+        )
+    return f"{namespace}:{user_id}"
+
+
+async def invalidate_user_devices(user_id) -> None:
+    """
+    Drop the cached device list for a user after devices change.
+
+    Reaches every worker only with the Redis backend; with the in-memory
+    backend other workers keep serving their copy until the TTL expires.
+    """
+    # Exact key (see user_key_builder): a namespace clear would run a
+    # KEYS scan on Redis, which is O(keyspace) and blocks the server
+    key = f"{FastAPICache.get_prefix()}:{DEVICES_NAMESPACE}:{user_id}"
+    try:
+        # Straight to the backend: FastAPICache.clear() always passes its
+        # prefix as a namespace, which would wipe every cached response
+        await FastAPICache.get_backend().clear(key=key)
+    except KeyError:
+        pass  # In-memory backend: nothing cached for this user
+    except Exception:
+        logger.exception("Failed to invalidate device cache for user %s", user_id)
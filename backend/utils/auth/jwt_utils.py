@@ -14,6 +14,7 @@ from fastapi import HTTPException, status, Request
 from datetime import timedelta
 
 from .token_storage import PostgreSQLStorage, RedisStorage, TokenStorage
+from utils.appwide.response_cache import invalidate_user_devices
 
 logger = logging.getLogger(__name__)
 
@@ -135,6 +136,8 @@ class SecureJWTManager:
                 detail="Authentication failed",
             )
 
+        await invalidate_user_devices(user_data["user_id"])
+
         return access_token, jti
 
     async def create_refresh_token(
@@ -217,8 +220,12 @@ class SecureJWTManager:
                     detail=f"Invalid token type. Expected {token_type}",
                 )
 
-            # Blacklist check (fail closed if storage fails)
-            if await self.storage.is_token_blacklisted(payload.get("jti")):
+            # Blacklist check (fail closed if storage fails); an access token's
+            # linked refresh token is checked in the same round trip
+            refresh_jti = payload.get("refresh_jti") if token_type == "access" else None
+            jtis = [payload.get("jti")] + ([refresh_jti] if refresh_jti else [])
+            blacklisted = await self.storage.are_tokens_blacklisted(jtis)
+            if any(blacklisted.values()):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Token has been revoked",
@@ -226,7 +233,6 @@ class SecureJWTManager:
 
             # Access tokens: enforce link to a valid refresh token if refresh_jti exists
             if token_type == "access":
-                refresh_jti = payload.get("refresh_jti")
                 if refresh_jti:
                     refresh_data = await self.storage.get_refresh_token(refresh_jti)
                     if not refresh_data:
@@ -314,11 +320,15 @@ class SecureJWTManager:
 
     async def revoke_user_tokens(self, user_id: str) -> bool:
         """Revoke all tokens for a user"""
-        return await self.storage.revoke_user_tokens(user_id)
+        revoked = await self.storage.revoke_user_tokens(user_id)
+        await invalidate_user_devices(user_id)
+        return revoked
 
     async def revoke_device(self, user_id: str, device_fp: str) -> bool:
         """Revoke specific device"""
-        return await self.storage.revoke_device(user_id, device_fp)
+        revoked = await self.storage.revoke_device(user_id, device_fp)
+        await invalidate_user_devices(user_id)
+        return revoked
 
     async def get_user_devices(self, user_id: str) -> list:
         """Get list of authorized devices for user"""
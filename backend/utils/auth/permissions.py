@@ -0,0 +1,44 @@
+# utils/auth/permissions.py
+import logging
+from typing import FrozenSet
+
+from fastapi import Depends
+
+from utils.database.database import get_db
+from utils.database.query_manager import permission_query
+from models.auth_models import AuthUser
+from .auth_middleware import get_current_user
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+# ✅ EFFECTIVE PERMISSIONS (user_effective_permissions MV)
+# ---------------------------------------------------------
+async def get_user_permission_ids_with_roles(user_id: int, db) -> FrozenSet[str]:
+    """
+    Get the user's effective permission IDs ("<structure_id>:<action_key>").
+
+    Reads the precomputed user_effective_permissions materialized view,
+    so this is a single indexed lookup instead of a role → permission join.
+    """
+    try:
+        rows = await db.fetch_all_async(
+            permission_query("GET_USER_EFFECTIVE_PERMISSIONS"),
+            {"user_id": user_id},
+        )
+        return frozenset(row["permission_id"] for row in rows)
+    except Exception:
+        logger.exception("Failed to load effective permissions for user %s", user_id)
+        return frozenset()
+
+
+# ---------------------------------------------------------
+# ✅ PERMISSION DEPENDENCY
+# ---------------------------------------------------------
+async def get_current_user_permission_ids(
+    user: AuthUser = Depends(get_current_user),
+    db = Depends(get_db),
+) -> FrozenSet[str]:
+    """Per-request dependency; FastAPI caches it, so several checks share one lookup."""
+    return await get_user_permission_ids_with_roles(user.user_id, db)
@@ -23,6 +23,10 @@ class TokenStorage(ABC):
         """Check if token is blacklisted"""
         pass
 
+    async def are_tokens_blacklisted(self, jtis: List[str]) -> Dict[str, bool]:
+        """Check several tokens against the blacklist; backends may batch this"""
+        return {jti: await self.is_token_blacklisted(jti) for jti in jtis}
+
     @abstractmethod
     async def store_refresh_token(
         self,
@@ -52,7 +56,7 @@ class TokenStorage(ABC):
 
     @abstractmethod
     async def get_user_devices(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's authorized devices"""
+        """Get user's authorized devices with their latest refresh token"""
         pass
 
     @abstractmethod
@@ -103,6 +107,17 @@ class PostgreSQLStorage(TokenStorage):
             logger.exception("Failed to check if token is blacklisted")
             return True
 
+    async def are_tokens_blacklisted(self, jtis: List[str]) -> Dict[str, bool]:
+        query = "SELECT jti FROM token_blacklist WHERE jti = ANY(%s) AND expires_at > NOW()"
+        try:
+            rows = await self.db.fetch_all_async(query, (list(jtis),))
+            blacklisted = {row["jti"] for row in rows or []}
+            return {jti: jti in blacklisted for jti in jtis}
+        except Exception:
+            # Fail closed, same as is_token_blacklisted
+            logger.exception("Failed to check if tokens are blacklisted")
+            return {jti: True for jti in jtis}
+
     async def store_refresh_token(
         self,
         jti: str,
@@ -114,7 +129,7 @@ class PostgreSQLStorage(TokenStorage):
         # Store individual token
         token_query = """
             INSERT INTO refresh_tokens (jti, user_id, device_fp, expires_at, metadata)
-            VALUES (%s, %s, %s, NOW() + (%s * INTERVAL '1 second'), %s)
+            VALUES (%s, %s, %s, NOW() + (%s * INTERVAL '1 second'), %s::jsonb)
             ON CONFLICT (jti) DO UPDATE SET expires_at = EXCLUDED.expires_at,
                                           metadata = EXCLUDED.metadata
         """
@@ -217,11 +232,21 @@ class PostgreSQLStorage(TokenStorage):
             return False
 
     async def get_user_devices(self, user_id: str) -> List[Dict[str, Any]]:
+        # Latest refresh token per device is joined in, so callers don't
+        # need a follow-up query per device
         query = """
-            SELECT device_fp, metadata, last_seen
-            FROM user_devices 
-            WHERE user_id = %s AND expires_at > NOW()
-            ORDER BY last_seen DESC
+            SELECT d.device_fp, d.metadata, d.last_seen, d.expires_at,
+                   rt.jti AS latest_token_jti, rt.expires_at AS token_expires
+            FROM user_devices d
+            LEFT JOIN LATERAL (
+                SELECT jti, expires_at
+                FROM refresh_tokens
+                WHERE user_id = d.user_id AND device_fp = d.device_fp
+                ORDER BY expires_at DESC
+                LIMIT 1
+            ) rt ON true
+            WHERE d.user_id = %s AND d.expires_at > NOW()
+            ORDER BY d.last_seen DESC
         """
         try:
             results = await self.db.fetch_all_async(query, (user_id,))
@@ -239,7 +264,7 @@ class PostgreSQLStorage(TokenStorage):
     ) -> bool:
         query = """
             INSERT INTO user_devices (user_id, device_fp, expires_at, metadata)
-            VALUES (%s, %s, NOW() + (%s * INTERVAL '1 second'), %s)
+            VALUES (%s, %s, NOW() + (%s * INTERVAL '1 second'), %s::jsonb)
             ON CONFLICT (user_id, device_fp) 
             DO UPDATE SET 
                 expires_at = EXCLUDED.expires_at,
@@ -255,15 +280,42 @@ class PostgreSQLStorage(TokenStorage):
 
     async def cleanup_expired(self) -> bool:
         """Cleanup expired tokens and devices; return True on success."""
+        # One round trip per batch across all three tables; bounded batches
+        # keep row locks short so cleanup never stalls the auth hot path
+        query = """
+            WITH expired_blacklist AS (
+                DELETE FROM token_blacklist WHERE ctid IN (
+                    SELECT ctid FROM token_blacklist
+                    WHERE expires_at <= NOW() LIMIT %(batch_size)s
+                )
+                RETURNING 1
+            ),
+            expired_tokens AS (
+                DELETE FROM refresh_tokens WHERE ctid IN (
+                    SELECT ctid FROM refresh_tokens
+                    WHERE expires_at <= NOW() LIMIT %(batch_size)s
+                )
+                RETURNING 1
+            ),
+            expired_devices AS (
+                DELETE FROM user_devices WHERE ctid IN (
+                    SELECT ctid FROM user_devices
+                    WHERE expires_at <= NOW() LIMIT %(batch_size)s
+                )
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM expired_blacklist)
+                 + (SELECT COUNT(*) FROM expired_tokens)
+                 + (SELECT COUNT(*) FROM expired_devices) AS deleted
+        """
+        batch_size = int(os.getenv("CLEANUP_BATCH_SIZE", "10000"))
         try:
-            blacklist_query = "DELETE FROM token_blacklist WHERE expires_at <= NOW()"
-            await self.db.execute_async(blacklist_query)
-
-            token_query = "DELETE FROM refresh_tokens WHERE expires_at <= NOW()"
-            await self.db.execute_async(token_query)
-
-            device_query = "DELETE FROM user_devices WHERE expires_at <= NOW()"
-            await self.db.execute_async(device_query)
+            while True:
+                result = await self.db.execute_returning_async(
+                    query, {"batch_size": batch_size}
+                )
+                if not result or not result["deleted"]:
+                    break
 
             return True
         except Exception:
@@ -276,9 +328,9 @@ class RedisStorage(TokenStorage):
     """Redis implementation of token storage (partial)"""
 
     def __init__(self, redis_url: str):
-        import redis
+        import redis.asyncio as aioredis
 
-        self.client = redis.from_url(
+        self.client = aioredis.from_url(
             redis_url,
             decode_responses=True,
             socket_connect_timeout=3,
@@ -288,7 +340,7 @@ class RedisStorage(TokenStorage):
     async def blacklist_token(self, jti: str, user_id: str, expires_in: int) -> bool:
         key = f"blacklist:{jti}"
         try:
-            self.client.setex(key, expires_in, user_id)
+            await self.client.setex(key, expires_in, user_id)
             return True
         except Exception:
             logger.exception("Redis: Failed to blacklist token")
@@ -296,11 +348,22 @@ class RedisStorage(TokenStorage):
 
     async def is_token_blacklisted(self, jti: str) -> bool:
         try:
-            return self.client.exists(f"blacklist:{jti}") > 0
+            return await self.client.exists(f"blacklist:{jti}") > 0
         except Exception:
             logger.exception("Redis: Failed to check blacklist; failing closed")
             return True
 
+    async def are_tokens_blacklisted(self, jtis: List[str]) -> Dict[str, bool]:
+        try:
+            pipe = self.client.pipeline()
+            for jti in jtis:
+                pipe.exists(f"blacklist:{jti}")
+            results = await pipe.execute()
+            return {jti: exists > 0 for jti, exists in zip(jtis, results)}
+        except Exception:
+            logger.exception("Redis: Failed to check blacklist; failing closed")
+            return {jti: True for jti in jtis}
+
     # The rest of the methods should be implemented to match PostgreSQL semantics
     async def store_refresh_token(
         self,
@@ -1,4 +1,4 @@
 from .database import get_db
 from .query_manager import query_manager
 
-__all__ = ["get_db", "DatabaseConnection", "DatabaseManager"]
\ No newline at end of file
+__all__ = ["get_db", "query_manager"]
\ No newline at end of file
@@ -1,10 +1,30 @@
 # utils/database/database_async.py
 import os
 from functools import lru_cache
+from urllib.parse import quote, urlsplit
 
 from utils.database.database_async_core import AsyncDatabaseManager
 
 
+def _socket_dsn(dsn: str, socket_dir: str) -> str:
+    """
+    Point a DSN at a local UNIX-domain socket, keeping user/password/db/port.
+
+    postgresql://u:p@db:5432/app -> postgresql://u:p@/app?host=/var/run/postgresql&port=5432
+    """
+    parts = urlsplit(dsn)
+    # Reuse the userinfo verbatim: it is already percent-encoded
+    userinfo = parts.netloc.rpartition("@")[0]
+    auth = f"{userinfo}@" if userinfo else ""
+    query = f"host={quote(socket_dir, safe='/')}"
+    if parts.port:
+        # The socket file name is derived from the port (.s.PGSQL.<port>)
+        query += f"&port={parts.port}"
+    if parts.query:
+        query = f"{parts.query}&{query}"
+    return f"{parts.scheme}://{auth}{parts.path}?{query}"
+
+
 @lru_cache()
 def get_db_manager() -> AsyncDatabaseManager:
     """
@@ -13,18 +33,29 @@ def get_db_manager() -> AsyncDatabaseManager:
     Env:
       - DATABASE_URL: write DSN (required)
       - READ_REPLICA_URL: read DSN (optional)
+      - DATABASE_SOCKET_DIR: connect the write pool over the UNIX socket in
+        this directory (e.g. /var/run/postgresql) when Postgres is local
+      - PG_PER_WORKER_POOL: max pool size per worker process (default 10).
+        Every Uvicorn worker has its own pools, so keep
+        workers × PG_PER_WORKER_POOL ≤ 0.8 × Postgres max_connections
+        (counting the read pool separately against the replica)
     """
     write_dsn = os.getenv("DATABASE_URL")
     read_dsn = os.getenv("READ_REPLICA_URL")  # optional
+    socket_dir = os.getenv("DATABASE_SOCKET_DIR")  # optional
+    per_worker_cap = int(os.getenv("PG_PER_WORKER_POOL", "10"))
 
     if not write_dsn:
         raise RuntimeError("DATABASE_URL is not set")
 
+    if socket_dir:
+        write_dsn = _socket_dsn(write_dsn, socket_dir)
+
     return AsyncDatabaseManager(
         write_dsn=write_dsn,
         read_dsn=read_dsn,
-        min_pool_size=2,
-        max_pool_size=10,
+        min_pool_size=min(2, per_worker_cap),
+        max_pool_size=per_worker_cap,
         slow_query_ms=200,
         retries=3,
     )
@@ -1,77 +1,147 @@
 # utils/database/database_async_core.py
+import asyncio
 import asyncpg
 import logging
 import time
 import re
 from contextlib import asynccontextmanager
-from typing import Optional, Dict, Any, List
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterable, List, Tuple, AsyncIterator
 import re
 import json
 
 logger = logging.getLogger(__name__)
 # ============================================================
-# JSON PARSING HELPERS
+# JSON CODECS
 # ============================================================
 
-def _maybe_parse_json(value):
-    if value is None:
-        return None
+async def _init_connection(conn: asyncpg.Connection):
+    """
+    Per-connection setup (asyncpg `init=` hook).
 
-    # asyncpg already returns JSONB as dict/list when possible
-    if isinstance(value, (dict, list)):
-        return value
+    Registers json/jsonb codecs so values are decoded to dict/list by the
+    protocol layer and Python dicts/lists can be passed as parameters.
+    """
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(
+            typename,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog",
+            format="text",
+        )
 
-    if isinstance(value, str):
-        v = value.strip()
-        if not v:
-            return value
 
-        # Only attempt JSON parsing if the string *looks* like JSON
-        if v[0] in ("{", "["):
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return value
 
-    return value
+# ============================================================
+# Parameter conversion: %(name)s / %s → $1, $2, $3
+# ============================================================
 
+# "%%" is psycopg2's escaped literal percent. Matching it as an alternative
+# consumes it left to right, so "%%s" / "%%(x)s" are never read as placeholders
+_named_param_pattern = re.compile(r"%%|%\(([^)]+)\)s")
+_positional_pattern = re.compile(r"%%|%s")
 
+@lru_cache(maxsize=4096)
+def _compile_query(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Rewrite %(name)s placeholders to $1, $2, ... once per SQL template.
+
+    Returns the converted query and parameter names in $-index order.
+    Repeated names reuse the index of their first appearance; "%%" becomes
+    "%", as psycopg2 would send it.
+    """
+    seen: Dict[str, int] = {}
+
+    def _repl(match):
+        name = match.group(1)
+        if name is None:
+            return "%"
+        if name not in seen:
+            seen[name] = len(seen) + 1
+        return f"${seen[name]}"
+
+    converted = _named_param_pattern.sub(_repl, query)
+    return converted, tuple(seen)
 
-# ============================================================
-# Named parameter conversion: %(name)s → $1, $2, $3
-# ============================================================
 
-_named_param_pattern = re.compile(r"%\(([^)]+)\)s")
-#_positional_pattern = re.compile(r"%s")
+@lru_cache(maxsize=1024)
+def _compile_positional_query(query: str) -> str:
+    """Rewrite psycopg2 positional %s placeholders to $1, $2, ... once per template."""
+    index = 0
 
-def _convert_params(query: str, params: Dict[str, Any]):
+    def _repl(match):
+        nonlocal index
+        if match.group(0) == "%%":
+            return "%"
+        index += 1
+        return f"${index}"
+
+    return _positional_pattern.sub(_repl, query)
+
+
+def _convert_params(query: str, params):
     """
-    Convert psycopg2-style %(name)s placeholders into asyncpg-style $1, $2, ...
-    Handles repeated named placeholders correctly.
+    Convert psycopg2-style placeholders into asyncpg-style $1, $2, ...
+
+    - dict params: %(name)s placeholders, repeated names handled correctly
+    - list/tuple params: %s placeholders, or already $n-style queries
     """
     if not params:
         return query, []
 
-    names = _named_param_pattern.findall(query)
+    # Positional args: no name lookup needed
+    if isinstance(params, (list, tuple)):
+        if "%s" in query:
+            query = _compile_positional_query(query)
+        return query, list(params)
 
-    # Maintain order of first appearance
-    seen = {}
-    positional_params = []
-    index = 1
+    # Substring probe is far cheaper than a regex scan. A dict passed with
+    # an asyncpg-native $n query is taken in insertion order.
+    if "%(" not in query:
+        return query, (list(params.values()) if "$" in query else [])
 
-    for name in names:
-        if name not in seen:
-            if name not in params:
-                raise KeyError(f"Missing parameter: {name}")
-            seen[name] = index
-            positional_params.append(params[name])
-            index += 1
+    converted, names = _compile_query(query)
+    try:
+        positional_params = [params[name] for name in names]
+    except KeyError as e:
+        raise KeyError(f"Missing parameter: {e.args[0]}") from None
+
+    return converted, positional_params
 
-    # Replace each placeholder with its assigned $index
-    for name, idx in seen.items():
-        query = query.replace(f"%({name})s", f"${idx}")
 
-    return query, positional_params
+# ============================================================
+# Retry classification
+# ============================================================
+
+# Deterministic failures: the same query will fail the same way again
+_NON_RETRYABLE_ERRORS = (
+    asyncpg.IntegrityConstraintViolationError,
+    asyncpg.PostgresSyntaxError,
+    asyncpg.UndefinedTableError,
+    asyncpg.UndefinedColumnError,
+    asyncpg.DataError,
+    KeyError,
+)
+
+# The connection itself is unusable; retry on a different one
+_CONNECTION_ERRORS = (
+    asyncpg.ConnectionDoesNotExistError,
+    asyncpg.InterfaceError,
+    ConnectionError,
+    OSError,
+)
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """
+    True if the connection itself is unusable and must be replaced.
+
+    asyncio.TimeoutError is an OSError subclass since 3.11, but a timed-out
+    query leaves a healthy connection behind.
+    """
+    return isinstance(exc, _CONNECTION_ERRORS) and not isinstance(exc, TimeoutError)
 
 
 # ============================================================
@@ -85,6 +155,16 @@ class AsyncDatabaseError(Exception):
         self.query = query
 
 
+class _NotConnectedPool:
+    """Stand-in pool until connect() runs; fails with a clear error."""
+
+    def acquire(self, *args, **kwargs):
+        raise AsyncDatabaseError("Database pools not initialized; call connect() at startup")
+
+
+_NOT_CONNECTED = _NotConnectedPool()
+
+
 class AsyncDatabaseManager:
     """
     Enterprise-grade async DB manager with:
@@ -103,6 +183,10 @@ class AsyncDatabaseManager:
         max_pool_size: int = 10,
         slow_query_ms: int = 200,
         retries: int = 3,
+        max_inactive_connection_lifetime: float = 60.0,
+        max_queries: int = 50_000,
+        statement_cache_size: int = 1024,
+        acquire_timeout: float = 5.0,
     ):
         self.write_dsn = write_dsn
         self.read_dsn = read_dsn
@@ -110,32 +194,63 @@ class AsyncDatabaseManager:
         self.max_pool_size = max_pool_size
         self.slow_query_ms = slow_query_ms
         self.retries = retries
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self.max_queries = max_queries
+        self.statement_cache_size = statement_cache_size
+        # A saturated pool raises after this long instead of queueing forever
+        self.acquire_timeout = acquire_timeout
 
         self.write_pool: Optional[asyncpg.Pool] = None
         self.read_pool: Optional[asyncpg.Pool] = None
+        # Serializes pool creation so concurrent callers can't each build a pool
+        self._connect_lock = asyncio.Lock()
+        # Connection of the transaction_async block the current task is in;
+        # every method runs on it so the block is really one transaction
+        self._tx_conn: ContextVar[Optional[asyncpg.Connection]] = ContextVar(
+            "svau_tx_conn", default=None
+        )
+        self._select_pools()
 
     # ------------------------------------------------------
     # INIT POOLS
     # ------------------------------------------------------
+    def _pool_options(self) -> Dict[str, Any]:
+        """Shared asyncpg.create_pool settings for the write and read pools."""
+        return {
+            "min_size": self.min_pool_size,
+            "max_size": self.max_pool_size,
+            "command_timeout": 30,
+            "max_inactive_connection_lifetime": self.max_inactive_connection_lifetime,
+            "max_queries": self.max_queries,
+            "statement_cache_size": self.statement_cache_size,
+            "init": _init_connection,
+        }
+
     async def connect(self):
-        """Initialize write pool and optional read pool."""
-        if not self.write_pool:
-            self.write_pool = await asyncpg.create_pool(
-                dsn=self.write_dsn,
-                min_size=self.min_pool_size,
-                max_size=self.max_pool_size,
-                command_timeout=30,
-            )
-            logger.info("✅ Async write pool initialized")
-
-        if self.read_dsn and not self.read_pool:
-            self.read_pool = await asyncpg.create_pool(
-                dsn=self.read_dsn,
-                min_size=self.min_pool_size,
-                max_size=self.max_pool_size,
-                command_timeout=30,
-            )
-            logger.info("✅ Async read pool initialized")
+        """
+        Initialize write pool and optional read pool.
+
+        Call once at application startup; query methods expect the pools
+        to exist and do not connect lazily.
+        """
+        # Fast path: already connected, no lock needed
+        if self.write_pool and (not self.read_dsn or self.read_pool):
+            return
+
+        async with self._connect_lock:
+            if not self.write_pool:
+                self.write_pool = await asyncpg.create_pool(
+                    dsn=self.write_dsn, **self._pool_options()
+                )
+                logger.info("✅ Async write pool initialized")
+
+            if self.read_dsn and not self.read_pool:
+                self.read_pool = await asyncpg.create_pool(
+                    dsn=self.read_dsn, **self._pool_options()
+                )
+                logger.info("✅ Async read pool initialized")
+
+            self._select_pools()
 
     async def close(self):
         """Close pools on shutdown if needed."""
@@ -145,31 +260,29 @@ class AsyncDatabaseManager:
         if self.read_pool:
             await self.read_pool.close()
             self.read_pool = None
+        self._select_pools()
 
     # ------------------------------------------------------
     # POOL SELECTION (RW1)
     # ------------------------------------------------------
-    def _get_pool(self, write: bool) -> asyncpg.Pool:
+    def _select_pools(self):
         """
-        RW1 mode:
-        - If write=True → always use write pool.
-        - If write=False → use read pool if configured, else write pool.
+        RW1 mode, resolved once per connect/close instead of per query:
+        - writes → always the write pool.
+        - reads → read pool if configured, else write pool.
         """
-        if write or not self.read_pool:
-            if not self.write_pool:
-                raise AsyncDatabaseError("Write pool not initialized")
-            return self.write_pool
-
-        if not self.read_pool:
-            raise AsyncDatabaseError("Read pool requested but not initialized")
-
-        return self.read_pool
+        if self.write_pool:
+            self._write_pool_effective = self.write_pool
+            self._read_pool_effective = self.read_pool or self.write_pool
+        else:
+            self._write_pool_effective = _NOT_CONNECTED
+            self._read_pool_effective = _NOT_CONNECTED
 
     # ------------------------------------------------------
-    # TRANSACTION MANAGER (WRITE)
+    # TRANSACTION MANAGER
     # ------------------------------------------------------
     @asynccontextmanager
-    async def transaction_async(self):
+    async def transaction_async(self, readonly: bool = False):
         """
         Async transaction using the write pool.
 
@@ -177,19 +290,72 @@ class AsyncDatabaseManager:
             async with db.transaction_async():
                 await db.execute_async(...)
                 await db.execute_async(...)
-        """
-        await self.connect()
-        pool = self._get_pool(write=True)
 
-        async with pool.acquire() as conn:
-            tx = conn.transaction()
+        Manager calls made inside the block (in the same task) run on the
+        block's connection, so they commit or roll back together; they are
+        not retried, since a failed statement aborts the transaction. A
+        nested block becomes a savepoint.
+
+        readonly=True runs a REPEATABLE READ, READ ONLY transaction on the
+        read pool, so several reads share one snapshot. Single reads don't
+        need this: fetch_*_async run outside any explicit transaction.
+        """
+        outer = self._tx_conn.get()
+        if outer is not None:
+            async with outer.transaction():
+                yield outer
+            return
+
+        pool = self._read_pool_effective if readonly else self._write_pool_effective
+
+        async with pool.acquire(timeout=self.acquire_timeout) as conn:
+            if readonly:
+                # READ COMMITTED would take a new snapshot per statement
+                tx = conn.transaction(isolation="repeatable_read", readonly=True)
+            else:
+                tx = conn.transaction()
             await tx.start()
+            token = self._tx_conn.set(conn)
             try:
                 yield conn
                 await tx.commit()
             except Exception:
                 await tx.rollback()
                 raise
+            finally:
+                self._tx_conn.reset(token)
+
+    @asynccontextmanager
+    async def _connection(self, pool):
+        """The enclosing transaction_async connection, else one from `pool`."""
+        conn = self._tx_conn.get()
+        if conn is not None:
+            yield conn
+            return
+        async with pool.acquire(timeout=self.acquire_timeout) as conn:
+            yield conn
+
+    async def _run(self, conn: asyncpg.Connection, query: str, params: List[Any], fetch: str):
+        """Run one statement on `conn` and shape the result for `fetch`."""
+        start = time.perf_counter()
+
+        # Direct calls go through asyncpg's per-connection statement cache
+        if fetch == "one":
+            row = await conn.fetchrow(query, *params)
+            result = dict(row) if row else None
+
+        elif fetch == "all":
+            rows = await conn.fetch(query, *params)
+            result = [dict(r) for r in rows]
+        else:  # "exec": status string only, no result rows built
+            result = await conn.execute(query, *params)
+
+        # Monotonic clock; the message is only built when it will be emitted
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        if duration_ms > self.slow_query_ms and logger.isEnabledFor(logging.WARNING):
+            logger.warning("🐢 Slow query (%.2fms): %s", duration_ms, query)
+
+        return result
 
     # ------------------------------------------------------
     # INTERNAL EXECUTOR WITH RETRIES + LOGGING
@@ -207,8 +373,7 @@ class AsyncDatabaseManager:
         - write = True for write queries / transactions
         """
 
-        await self.connect()
-        pool = self._get_pool(write=write)
+        pool = self._write_pool_effective if write else self._read_pool_effective
 
         # Normalize params via converter for psycopg2-style queries
         if params is not None:
@@ -216,39 +381,51 @@ class AsyncDatabaseManager:
         else:
             params = []
 
-        for attempt in range(1, self.retries + 1):
+        tx_conn = self._tx_conn.get()
+        if tx_conn is not None:
             try:
-                start = time.time()
-
-                async with pool.acquire() as conn:
-                    stmt = await conn.prepare(query)
-
-                    if fetch == "one":
-                        row = await stmt.fetchrow(*params)
-                        result = {k: _maybe_parse_json(v) for k, v in dict(row).items()} if row else None
-
-                    elif fetch == "all":
-                        rows = await stmt.fetch(*params)
-                        result = [
-                            {k: _maybe_parse_json(v) for k, v in dict(r).items()}
-                            for r in rows
-                        ]
-                    else:  # "exec"
-                        result = await stmt.fetch(*params)
-                        return result
-                        #result = True
-
-                duration = (time.time() - start) * 1000
-                if duration > self.slow_query_ms:
-                    logger.warning(f"🐢 Slow query ({duration:.2f}ms): {query}")
+                return await self._run(tx_conn, query, params, fetch)
+            except Exception as e:
+                logger.error(f"DB error in transaction (not retried): {e} | Query: {query}")
+                raise AsyncDatabaseError(str(e), query=query)
 
-                return result
+        attempt = 0
+        while True:
+            try:
+                # One connection serves every retry of a failing query; only a
+                # broken connection is handed back so the pool can replace it
+                async with pool.acquire(timeout=self.acquire_timeout) as conn:
+                    while True:
+                        attempt += 1
+                        try:
+                            return await self._run(conn, query, params, fetch)
+
+                        except _NON_RETRYABLE_ERRORS as e:
+                            # Same query, same answer: retrying only wastes round trips
+                            logger.error(f"DB error (not retried): {e} | Query: {query}")
+                            raise AsyncDatabaseError(str(e), query=query)
+
+                        except Exception as e:
+                            broken = _is_connection_error(e)
+                            kind = "connection error" if broken else "error"
+                            logger.error(
+                                f"DB {kind} (attempt {attempt}/{self.retries}): {e} | Query: {query}"
+                            )
+                            if attempt >= self.retries:
+                                raise AsyncDatabaseError(str(e), query=query)
+                            if broken:
+                                break  # re-acquire a fresh connection
+
+            except AsyncDatabaseError:
+                raise
 
             except Exception as e:
+                # Acquire timed out or the pool couldn't open a connection
+                attempt += 1
                 logger.error(
-                    f"DB error (attempt {attempt}/{self.retries}): {e} | Query: {query}"
+                    f"DB acquire error (attempt {attempt}/{self.retries}): {e} | Query: {query}"
                 )
-                if attempt == self.retries:
+                if attempt >= self.retries:
                     raise AsyncDatabaseError(str(e), query=query)
 
 
@@ -267,12 +444,53 @@ class AsyncDatabaseManager:
         """
         return await self._execute(query, params, fetch="all", write=False)
 
+    async def stream_query(
+        self,
+        query: str,
+        params: Optional[Any] = None,
+        chunk: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield rows of a large result set without materializing it.
+
+        Uses a server-side cursor on the read pool, so PostgreSQL sends rows
+        in batches of `chunk` and memory stays O(chunk), not O(rows).
+
+        Usage:
+            async for row in db.stream_query(REPORT_SQL, {"since": since}):
+                ...
+        """
+        if params is not None:
+            query, params = _convert_params(query, params)
+        else:
+            params = []
+
+        try:
+            tx_conn = self._tx_conn.get()
+            if tx_conn is not None:
+                # Already inside transaction_async, which a cursor needs
+                async for row in tx_conn.cursor(query, *params, prefetch=chunk):
+                    yield dict(row)
+                return
+
+            pool = self._read_pool_effective
+            async with pool.acquire(timeout=self.acquire_timeout) as conn:
+                # asyncpg cursors only exist inside a transaction
+                async with conn.transaction(readonly=True):
+                    async for row in conn.cursor(query, *params, prefetch=chunk):
+                        yield dict(row)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            logger.error(f"DB error while streaming: {e} | Query: {query}")
+            raise AsyncDatabaseError(str(e), query=query)
+
     # ------------------------------------------------------
     # PUBLIC METHODS – WRITE
     # ------------------------------------------------------
     async def execute_async(self, query: str, params: Optional[Dict[str, Any]] = None):
         """
         Write query without RETURNING.
+
+        Returns the command status string, e.g. "UPDATE 1".
         """
         return await self._execute(query, params, fetch="exec", write=True)
 
@@ -282,7 +500,29 @@ class AsyncDatabaseManager:
         """
         return await self._execute(query, params, fetch="one", write=True)
 
-    async def execute_many_returning_async(self, query: str, values: List[tuple]):
+    async def execute_many_async(self, query: str, rows: List[Any]):
+        """
+        Bulk write without RETURNING (UPDATE/DELETE/INSERT) in one transaction.
+
+        `rows` may be tuples for $n / %s queries or dicts for %(name)s
+        queries. conn.executemany reuses one prepared statement and
+        pipelines the rows instead of paying a round trip per call.
+        """
+        if not rows:
+            return
+
+        args = [_convert_params(query, row)[1] for row in rows]
+        query = _convert_params(query, rows[0])[0]
+
+        pool = self._write_pool_effective
+
+        async with self._connection(pool) as conn:
+            async with conn.transaction():
+                await conn.executemany(query, args)
+
+    async def execute_many_returning_async(
+        self, query: str, values: List[tuple], chunk_size: int = 200, raw: bool = False
+    ):
         """
         Bulk insert with RETURNING using a single prepared statement.
 
@@ -293,17 +533,70 @@ class AsyncDatabaseManager:
 
         And `values` a list of tuples:
             [(a1, b1, c1), (a2, b2, c2), ...]
+
+        Rows are sent pipelined (conn.fetchmany) in chunks of `chunk_size`,
+        so a chunk costs one round trip instead of one per row.
+
+        With raw=True the asyncpg Records are returned as-is (they support
+        both index and key access), skipping dict construction.
+        """
+        pool = self._write_pool_effective
+
+        rows = []
+        async with self._connection(pool) as conn:
+            async with conn.transaction():
+                for i in range(0, len(values), chunk_size):
+                    chunk = values[i:i + chunk_size]
+                    rows.extend(r for r in await conn.fetchmany(query, chunk) if r)
+
+        if raw or not rows:
+            return rows
+
+        # One statement, one column layout: resolve the keys once
+        keys = tuple(rows[0].keys())
+        return [dict(zip(keys, r)) for r in rows]
+
+    async def execute_unnest_returning_async(self, query: str, columns: List[list]):
+        """
+        Set-based bulk insert in a single statement and round trip.
+
+        Pass one array per column and unnest them server-side:
+            INSERT INTO table (a, b)
+            SELECT * FROM unnest($1::int[], $2::text[])
+            RETURNING ...
+
+        Use when RETURNING row order doesn't need to match the input order.
         """
-        await self.connect()
-        pool = self._get_pool(write=True)
+        pool = self._write_pool_effective
 
-        async with pool.acquire() as conn:
-            stmt = await conn.prepare(query)
+        async with self._connection(pool) as conn:
+            rows = await conn.fetch(query, *columns)
 
-            rows = []
-            for v in values:
-                row = await stmt.fetchrow(*v)
-                if row:
-                    rows.append(dict(row))
+        return [dict(r) for r in rows]
 
-        return rows
+    async def copy_bulk_insert(
+        self,
+        table: str,
+        columns: List[str],
+        records: Iterable[tuple],
+        schema_name: str = "public",
+    ) -> str:
+        """
+        Bulk load rows with the binary COPY protocol.
+
+        Far faster than INSERT for large loads (thousands of rows), but
+        RETURNING is not available. Bulk inserts that need the generated
+        rows back should use execute_many_returning_async or
+        execute_unnest_returning_async instead.
+
+        Returns the COPY status string, e.g. "COPY 1000".
+        """
+        pool = self._write_pool_effective
+
+        async with self._connection(pool) as conn:
+            return await conn.copy_records_to_table(
+                table,
+                records=records,
+                columns=columns,
+                schema_name=schema_name,
+            )
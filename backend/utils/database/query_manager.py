@@ -1,175 +1,295 @@
 """
 Enhanced Query Manager with Database Statistics Logging
-LRU caching, TTL, lazy loading, and comprehensive analytics
+Lazy loading, in-memory query lookup, and comprehensive analytics
 """
+import atexit
 import importlib
+import queue
+import threading
 import time
 import csv
-from collections import OrderedDict
+from collections import Counter, namedtuple
+from contextlib import contextmanager
 from typing import Dict, Tuple, List, Optional, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
 
+from psycopg2.extras import execute_values
+
 logger = logging.getLogger(__name__)
 
+# One queued usage row; a plain tuple underneath (no per-instance __dict__),
+# passed to execute_values as-is. Field order matches INSERT_USAGE_TEMPLATE.
+QueryUsageRecord = namedtuple(
+    "QueryUsageRecord",
+    "timestamp category query_name cache_hit response_time_ms user_id endpoint app_version",
+)
+
+class _ThreadUsage:
+    """Usage counters owned by one thread; only that thread writes them."""
+    __slots__ = ("hits", "misses", "daily", "queries", "bucket", "today")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.daily: Dict[str, Dict[str, int]] = {}
+        # Keyed by (category, query_name); dotted names are built only for reports
+        self.queries: Counter = Counter()
+        # Today's date string, rebuilt only when the UTC day changes
+        self.bucket = -1
+        self.today = ""
+
 class DatabaseStatsLogger:
     """Database logger for query usage statistics"""
-    
-    def __init__(self, db_connection_func):
-        self.get_db_connection = db_connection_func
+
+    INSERT_USAGE_SQL = """
+        INSERT INTO query_usage_stats 
+        (timestamp, category, query_name, cache_hit, response_time_ms, user_id, endpoint, application_version)
+        VALUES %s
+    """
+    INSERT_USAGE_TEMPLATE = "(to_timestamp(%s), %s, %s, %s, %s, %s, %s, %s)"
+
+    # All report sections in one statement: each column is a JSON document
+    # aggregated from the query_usage_daily rollup for the requested window
+    USAGE_STATS_SQL = """
+        WITH base AS (
+            SELECT *
+            FROM query_usage_daily
+            WHERE day >= %(since)s::date
+              AND (%(category)s::text IS NULL OR category = %(category)s)
+        )
+        SELECT
+            (SELECT row_to_json(s) FROM (
+                SELECT 
+                    COALESCE(SUM(call_count), 0) as total_queries,
+                    COALESCE(SUM(cache_hits), 0) as cache_hits,
+                    SUM(total_ms) / NULLIF(SUM(call_count), 0) as avg_response_time,
+                    -- Call-weighted mean of the daily p95s (approximate over multiple days)
+                    SUM(p95_ms * call_count) / NULLIF(SUM(call_count), 0) as p95_response_time,
+                    MIN(min_ms) as min_response_time,
+                    MAX(max_ms) as max_response_time
+                FROM base
+            ) s) AS summary,
+
+            (SELECT COALESCE(json_agg(t), '[]'::json) FROM (
+                SELECT 
+                    category, 
+                    query_name, 
+                    SUM(call_count) as usage_count,
+                    SUM(total_ms) / SUM(call_count) as avg_response_time,
+                    SUM(cache_hits) as cache_hits
+                FROM base
+                GROUP BY category, query_name
+                ORDER BY usage_count DESC
+                LIMIT 15
+            ) t) AS top_queries,
+
+            (SELECT COALESCE(json_agg(c), '[]'::json) FROM (
+                SELECT 
+                    category,
+                    SUM(call_count) as total_queries,
+                    SUM(cache_hits) as cache_hits,
+                    SUM(total_ms) / SUM(call_count) as avg_response_time
+                FROM base
+                GROUP BY category
+                ORDER BY total_queries DESC
+            ) c) AS category_stats,
+
+            (SELECT COALESCE(json_agg(d), '[]'::json) FROM (
+                SELECT 
+                    day as date,
+                    SUM(call_count) as total_queries,
+                    SUM(cache_hits) as cache_hits,
+                    SUM(total_ms) / SUM(call_count) as avg_response_time
+                FROM base
+                GROUP BY day
+                ORDER BY date DESC
+                LIMIT 30
+            ) d) AS daily_trends,
+
+            (SELECT COALESCE(json_agg(q), '[]'::json) FROM (
+                SELECT 
+                    category,
+                    query_name,
+                    SUM(slow_count) as call_count,
+                    SUM(slow_total_ms) / SUM(slow_count) as avg_response_time,
+                    MAX(max_ms) as max_response_time
+                FROM base
+                WHERE slow_count > 0
+                GROUP BY category, query_name
+                HAVING SUM(slow_count) >= 5
+                ORDER BY avg_response_time DESC
+                LIMIT 10
+            ) q) AS slow_queries
+    """
+
+    REFRESH_DAILY_SQL = "SELECT rollup_query_usage_daily()"
+
+    MAINTAIN_PARTITIONS_SQL = """
+        SELECT ensure_query_usage_partitions(%(days_ahead)s),
+               drop_old_query_usage_partitions(%(retain_days)s)
+    """
+
+    def __init__(self, pool, flush_interval: float = 5.0, batch_size: int = 500,
+                 max_queue_size: int = 10_000):
+        # psycopg2 connection pool (e.g. ThreadedConnectionPool); connections
+        # are reused instead of reconnecting for every write or report
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # Callers only enqueue; a background worker batches rows into the database.
+        # The queue is bounded so a stalled database can't grow memory without limit.
+        self._queue: "queue.Queue[QueryUsageRecord]" = queue.Queue(maxsize=max_queue_size)
+        self.dropped_count = 0
+        self._worker = threading.Thread(
+            target=self._drain_loop, name="query-usage-logger", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection and always hand it back"""
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        finally:
+            self.pool.putconn(conn)
     
     def log_query_usage(self, category: str, query_name: str, cache_hit: bool, 
                        response_time_ms: float, user_id: int = None, 
                        endpoint: str = None, app_version: str = None):
-        """Log query usage to database"""
+        """Queue a query usage row and return immediately (dropped if the queue is full)"""
+        row = QueryUsageRecord(time.time(), category, query_name, cache_hit,
+                               round(response_time_ms, 2), user_id, endpoint, app_version)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped_count += 1
+
+    def _drain_loop(self):
+        """Collect up to batch_size rows or flush_interval seconds' worth, then write them"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_rows(batch)
+
+    def flush(self):
+        """Write whatever is still queued (called at interpreter exit)"""
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write_rows(rows)
+
+    def _write_rows(self, rows: List[QueryUsageRecord]):
+        """Insert rows as multi-row VALUES statements (1000 rows each) and a single commit"""
+        if not rows:
+            return
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                execute_values(
+                    cursor, self.INSERT_USAGE_SQL, rows,
+                    template=self.INSERT_USAGE_TEMPLATE, page_size=1000
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to log {len(rows)} query usage rows to database: {e}")
+
+    def refresh_daily_rollup(self):
+        """Upsert today's and yesterday's rows into query_usage_daily (run on a schedule)"""
         try:
-            conn = self.get_db_connection()
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO query_usage_stats 
-                    (timestamp, category, query_name, cache_hit, response_time_ms, user_id, endpoint, application_version)
-                    VALUES (NOW(), %s, %s, %s, %s, %s, %s, %s)
-                """, (category, query_name, cache_hit, round(response_time_ms, 2), user_id, endpoint, app_version))
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(self.REFRESH_DAILY_SQL)
                 conn.commit()
-            conn.close()
         except Exception as e:
-            logger.error(f"Failed to log query usage to database: {e}")
+            logger.error(f"Failed to refresh query usage rollup: {e}")
+
+    def maintain_partitions(self, days_ahead: int = 7, retain_days: int = 365):
+        """Pre-create upcoming daily partitions and drop expired ones (run daily)"""
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(self.MAINTAIN_PARTITIONS_SQL, {
+                    "days_ahead": days_ahead,
+                    "retain_days": retain_days,
+                })
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to maintain query usage partitions: {e}")
 
     def get_usage_stats(self, days: int = 30, category: str = None) -> Dict[str, Any]:
-        """Get comprehensive usage statistics from database"""
+        """
+        Get comprehensive usage statistics from database (one round trip).
+
+        Reads the query_usage_daily rollup, so figures lag the raw log by up
+        to one refresh interval.
+        """
         try:
-            conn = self.get_db_connection()
-            with conn.cursor() as cursor:
-                where_clause = "WHERE timestamp >= %s"
-                params = [datetime.now() - timedelta(days=days)]
-                
-                if category:
-                    where_clause += " AND category = %s"
-                    params.append(category)
-                
-                # Basic summary
-                cursor.execute(f"""
-                    SELECT 
-                        COUNT(*) as total_queries,
-                        SUM(CASE WHEN cache_hit THEN 1 ELSE 0 END) as cache_hits,
-                        AVG(response_time_ms) as avg_response_time,
-                        PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY response_time_ms) as p95_response_time,
-                        MIN(response_time_ms) as min_response_time,
-                        MAX(response_time_ms) as max_response_time
-                    FROM query_usage_stats
-                    {where_clause}
-                """, params)
-                summary = cursor.fetchone()
-                
-                # Top queries by usage
-                cursor.execute(f"""
-                    SELECT 
-                        category, 
-                        query_name, 
-                        COUNT(*) as usage_count,
-                        AVG(response_time_ms) as avg_response_time,
-                        SUM(CASE WHEN cache_hit THEN 1 ELSE 0 END) as cache_hits
-                    FROM query_usage_stats
-                    {where_clause}
-                    GROUP BY category, query_name
-                    ORDER BY usage_count DESC
-                    LIMIT 15
-                """, params)
-                top_queries = cursor.fetchall()
-                
-                # Cache performance by category
-                cursor.execute(f"""
-                    SELECT 
-                        category,
-                        COUNT(*) as total_queries,
-                        SUM(CASE WHEN cache_hit THEN 1 ELSE 0 END) as cache_hits,
-                        AVG(response_time_ms) as avg_response_time
-                    FROM query_usage_stats
-                    {where_clause}
-                    GROUP BY category
-                    ORDER BY total_queries DESC
-                """, params)
-                category_stats = cursor.fetchall()
-                
-                # Daily trends
-                cursor.execute(f"""
-                    SELECT 
-                        DATE(timestamp) as date,
-                        COUNT(*) as total_queries,
-                        SUM(CASE WHEN cache_hit THEN 1 ELSE 0 END) as cache_hits,
-                        AVG(response_time_ms) as avg_response_time
-                    FROM query_usage_stats
-                    {where_clause}
-                    GROUP BY DATE(timestamp)
-                    ORDER BY date DESC
-                    LIMIT 30
-                """, params)
-                daily_trends = cursor.fetchall()
-                
-                # Slow queries (above 100ms)
-                cursor.execute(f"""
-                    SELECT 
-                        category,
-                        query_name,
-                        COUNT(*) as call_count,
-                        AVG(response_time_ms) as avg_response_time,
-                        MAX(response_time_ms) as max_response_time
-                    FROM query_usage_stats
-                    WHERE response_time_ms > 100
-                    GROUP BY category, query_name
-                    HAVING COUNT(*) >= 5
-                    ORDER BY avg_response_time DESC
-                    LIMIT 10
-                """)
-                slow_queries = cursor.fetchall()
-                
-            conn.close()
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(self.USAGE_STATS_SQL, {
+                    "since": datetime.now() - timedelta(days=days),
+                    "category": category,
+                })
+                summary, top_queries, category_stats, daily_trends, slow_queries = cursor.fetchone()
             
+            total_queries = summary["total_queries"] or 0
+            cache_hits = summary["cache_hits"] or 0
             return {
                 "summary": {
-                    "total_queries": summary[0] or 0,
-                    "cache_hits": summary[1] or 0,
-                    "cache_misses": (summary[0] or 0) - (summary[1] or 0),
-                    "cache_hit_ratio": round((summary[1] or 0) / (summary[0] or 1), 3),
-                    "avg_response_time_ms": round(float(summary[2] or 0), 2),
-                    "p95_response_time_ms": round(float(summary[3] or 0), 2),
-                    "min_response_time_ms": round(float(summary[4] or 0), 2),
-                    "max_response_time_ms": round(float(summary[5] or 0), 2)
+                    "total_queries": total_queries,
+                    "cache_hits": cache_hits,
+                    "cache_misses": total_queries - cache_hits,
+                    "cache_hit_ratio": round(cache_hits / (total_queries or 1), 3),
+                    "avg_response_time_ms": round(float(summary["avg_response_time"] or 0), 2),
+                    "p95_response_time_ms": round(float(summary["p95_response_time"] or 0), 2),
+                    "min_response_time_ms": round(float(summary["min_response_time"] or 0), 2),
+                    "max_response_time_ms": round(float(summary["max_response_time"] or 0), 2)
                 },
                 "top_queries": [
                     {
-                        "category": row[0],
-                        "query_name": row[1],
-                        "usage_count": row[2],
-                        "avg_response_time_ms": round(float(row[3]), 2),
-                        "cache_hit_ratio": round(row[4] / row[2], 3) if row[2] > 0 else 0
+                        "category": row["category"],
+                        "query_name": row["query_name"],
+                        "usage_count": row["usage_count"],
+                        "avg_response_time_ms": round(float(row["avg_response_time"]), 2),
+                        "cache_hit_ratio": round(row["cache_hits"] / row["usage_count"], 3) if row["usage_count"] > 0 else 0
                     } for row in top_queries
                 ],
                 "category_performance": [
                     {
-                        "category": row[0],
-                        "total_queries": row[1],
-                        "cache_hits": row[2],
-                        "cache_hit_ratio": round(row[2] / row[1], 3) if row[1] > 0 else 0,
-                        "avg_response_time_ms": round(float(row[3]), 2)
+                        "category": row["category"],
+                        "total_queries": row["total_queries"],
+                        "cache_hits": row["cache_hits"],
+                        "cache_hit_ratio": round(row["cache_hits"] / row["total_queries"], 3) if row["total_queries"] > 0 else 0,
+                        "avg_response_time_ms": round(float(row["avg_response_time"]), 2)
                     } for row in category_stats
                 ],
                 "daily_trends": [
                     {
-                        "date": row[0].isoformat(),
-                        "total_queries": row[1],
-                        "cache_hits": row[2],
-                        "cache_hit_ratio": round(row[2] / row[1], 3) if row[1] > 0 else 0,
-                        "avg_response_time_ms": round(float(row[3]), 2)
+                        "date": row["date"],
+                        "total_queries": row["total_queries"],
+                        "cache_hits": row["cache_hits"],
+                        "cache_hit_ratio": round(row["cache_hits"] / row["total_queries"], 3) if row["total_queries"] > 0 else 0,
+                        "avg_response_time_ms": round(float(row["avg_response_time"]), 2)
                     } for row in daily_trends
                 ],
                 "slow_queries": [
                     {
-                        "category": row[0],
-                        "query_name": row[1],
-                        "call_count": row[2],
-                        "avg_response_time_ms": round(float(row[3]), 2),
-                        "max_response_time_ms": round(float(row[4]), 2)
+                        "category": row["category"],
+                        "query_name": row["query_name"],
+                        "call_count": row["call_count"],
+                        "avg_response_time_ms": round(float(row["avg_response_time"]), 2),
+                        "max_response_time_ms": round(float(row["max_response_time"]), 2)
                     } for row in slow_queries
                 ]
             }
@@ -179,29 +299,26 @@ class DatabaseStatsLogger:
             return {"error": str(e)}
 
 class QueryManager:
-    def __init__(self, queries_package: str = "queries", cache_size: int = 100, 
-                 ttl_seconds: int = 300, preload_categories: List[str] = None,
+    def __init__(self, queries_package: str = "queries", preload_categories: List[str] = None,
                  stats_logger: DatabaseStatsLogger = None):
         self.queries_package = queries_package
-        self.cache_size = cache_size
-        self.ttl_seconds = ttl_seconds
         self.stats_logger = stats_logger
         
         self._queries_cache: Dict[str, Dict[str, str]] = {}
-        self._cache: OrderedDict[str, Tuple[str, float]] = OrderedDict()
-        self._hit_count = 0
-        self._miss_count = 0
-        self._daily_usage: Dict[str, Dict[str, int]] = {}
-        self._query_usage: Dict[str, int] = {}
+        # (category, QUERY_NAME) -> sql for every loaded category. Query constants
+        # never change at runtime: no TTL, no eviction
+        self._flat_cache: Dict[Tuple[str, str], str] = {}
+        # Per-thread usage counters: get_query never takes a lock and no
+        # increment is lost. Readers merge every thread's counters under
+        # _stats_lock, which only guards the registry list.
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_usage: List[_ThreadUsage] = []
 
         # Preload hot categories if provided
         if preload_categories:
             for category in preload_categories:
                 self._load_query_module(category)
-                for query_name, query in self._queries_cache.get(category, {}).items():
-                    key = f"{category}.{query_name}"
-                    self._cache[key] = (query, time.time())
-            self._evict_if_needed()
 
     def _load_query_module(self, category: str):
         """Load queries for a category if not already loaded."""
@@ -210,82 +327,105 @@ class QueryManager:
         try:
             full_module_name = f"{self.queries_package}.{category}_queries"
             module = importlib.import_module(full_module_name)
+            # One pass over the module namespace; runs once per category
             queries = {
-                attr: getattr(module, attr)
-                for attr in dir(module)
-                if attr.isupper() and isinstance(getattr(module, attr), str)
+                attr: value
+                for attr, value in vars(module).items()
+                if attr.isupper() and isinstance(value, str)
             }
             self._queries_cache[category] = queries
+            self._flat_cache.update(
+                ((category, name), sql) for name, sql in queries.items()
+            )
             logger.info(f"Loaded {len(queries)} queries from category '{category}'")
         except ImportError:
             raise ValueError(f"Query category '{category}' not found")
 
-    def _is_expired(self, timestamp: float) -> bool:
-        return (time.time() - timestamp) > self.ttl_seconds
-
-    def _evict_if_needed(self):
-        while len(self._cache) > self.cache_size:
-            evicted_key, _ = self._cache.popitem(last=False)
-            logger.debug(f"Evicted from cache: {evicted_key}")
-
-    def _log_usage(self, key: str, hit: bool):
+    def _log_usage(self, key: Tuple[str, str], hit: bool):
         """Log usage to in-memory counters"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        if today not in self._daily_usage:
-            self._daily_usage[today] = {"hits": 0, "misses": 0}
+        usage = getattr(self._local, "usage", None)
+        if usage is None:
+            usage = self._register_thread_usage()
+
+        bucket = int(time.time() // 86400)
+        if bucket != usage.bucket:
+            usage.bucket = bucket
+            usage.today = datetime.fromtimestamp(bucket * 86400, timezone.utc).strftime("%Y-%m-%d")
+        day = usage.daily.get(usage.today)
+        if day is None:
+            day = usage.daily[usage.today] = {"hits": 0, "misses": 0}
         if hit:
-            self._daily_usage[today]["hits"] += 1
+            usage.hits += 1
+            day["hits"] += 1
         else:
-            self._daily_usage[today]["misses"] += 1
+            usage.misses += 1
+            day["misses"] += 1
 
         # Track per-query usage
-        self._query_usage[key] = self._query_usage.get(key, 0) + 1
+        usage.queries[key] += 1
+
+    def _register_thread_usage(self) -> _ThreadUsage:
+        """Create this thread's counters (once per thread)"""
+        usage = _ThreadUsage()
+        self._local.usage = usage
+        with self._stats_lock:
+            self._thread_usage.append(usage)
+        return usage
+
+    def _merged_usage(self) -> Tuple[int, int, Dict[str, Dict[str, int]], Counter]:
+        """Sum every thread's counters: (hits, misses, daily, per-query)"""
+        hits = misses = 0
+        daily: Dict[str, Dict[str, int]] = {}
+        queries: Counter = Counter()
+        with self._stats_lock:
+            for usage in self._thread_usage:
+                hits += usage.hits
+                misses += usage.misses
+                # dict.copy() is one C call, so the owning thread can't
+                # resize the dict under the iteration
+                for today, counts in usage.daily.copy().items():
+                    merged = daily.setdefault(today, {"hits": 0, "misses": 0})
+                    merged["hits"] += counts["hits"]
+                    merged["misses"] += counts["misses"]
+                queries.update(dict.copy(usage.queries))
+        return hits, misses, daily, queries
 
     def get_query(self, category: str, query_name: str, user_id: int = None, 
                   endpoint: str = None, app_version: str = "1.0.0") -> str:
         """Get query with comprehensive logging"""
         start_time = time.time()
-        key = f"{category}.{query_name}"
+        key = (category, query_name)
         
-        # Check cache
-        if key in self._cache:
-            query, ts = self._cache[key]
-            if not self._is_expired(ts):
-                self._cache.move_to_end(key)
-                self._hit_count += 1
-                response_time = (time.time() - start_time) * 1000
-                
-                # Log to memory
-                self._log_usage(key, hit=True)
-                
-                # Log to database
-                if self.stats_logger:
-                    self.stats_logger.log_query_usage(
-                        category=category,
-                        query_name=query_name,
-                        cache_hit=True,
-                        response_time_ms=response_time,
-                        user_id=user_id,
-                        endpoint=endpoint,
-                        app_version=app_version
-                    )
-                
-                logger.debug(f"Cache HIT: {key} ({response_time:.2f}ms)")
-                return query
-            else:
-                del self._cache[key]
-                logger.debug(f"Cache EXPIRED: {key}")
+        # Check cache (tuple key: no string built for the lookup)
+        query = self._flat_cache.get(key)
+        if query is not None:
+            response_time = (time.time() - start_time) * 1000
+            
+            # Log to memory
+            self._log_usage(key, hit=True)
+            
+            # Log to database
+            if self.stats_logger:
+                self.stats_logger.log_query_usage(
+                    category=category,
+                    query_name=query_name,
+                    cache_hit=True,
+                    response_time_ms=response_time,
+                    user_id=user_id,
+                    endpoint=endpoint,
+                    app_version=app_version
+                )
+            
+            logger.debug("Cache HIT: %s.%s (%.2fms)", category, query_name, response_time)
+            return query
 
-        # Cache miss - load from module
+        # Cache miss - load the category module, which fills the flat cache
         self._load_query_module(category)
-        query = self._queries_cache.get(category, {}).get(query_name)
+        query = self._flat_cache.get(key)
         if not query:
             available = list(self._queries_cache.get(category, {}).keys())
             raise ValueError(f"Unknown query: '{category}.{query_name}'. Available: {available}")
 
-        # Add to cache
-        self._cache[key] = (query, time.time())
-        self._miss_count += 1
         response_time = (time.time() - start_time) * 1000
         
         # Log to memory and database
@@ -301,50 +441,51 @@ class QueryManager:
                 app_version=app_version
             )
         
-        logger.debug(f"Cache MISS: {key} ({response_time:.2f}ms)")
-        self._evict_if_needed()
+        logger.debug("Cache MISS: %s.%s (%.2fms)", category, query_name, response_time)
         return query
 
     def reload_queries(self):
         """Reload all queries from source modules"""
         self._queries_cache.clear()
-        self._cache.clear()
-        self._hit_count = 0
-        self._miss_count = 0
-        self._daily_usage.clear()
-        self._query_usage.clear()
+        self._flat_cache.clear()
+        with self._stats_lock:
+            # Fresh thread-local: each thread registers new counters on next use
+            self._local = threading.local()
+            self._thread_usage = []
         logger.info("All queries reloaded")
 
     def cache_stats(self) -> Dict[str, Any]:
         """Get current cache statistics"""
-        total_requests = self._hit_count + self._miss_count
-        hit_ratio = self._hit_count / total_requests if total_requests > 0 else 0
+        hits, misses, _, _ = self._merged_usage()
+        total_requests = hits + misses
+        hit_ratio = hits / total_requests if total_requests > 0 else 0
         
         return {
-            "cache_size": len(self._cache),
-            "max_size": self.cache_size,
-            "ttl_seconds": self.ttl_seconds,
+            "cache_size": len(self._flat_cache),
             "total_requests": total_requests,
-            "hits": self._hit_count,
-            "misses": self._miss_count,
+            "hits": hits,
+            "misses": misses,
             "hit_ratio": round(hit_ratio, 3),
-            "cache_utilization": f"{len(self._cache)}/{self.cache_size}",
-            "cached_queries": list(self._cache.keys())
+            "cached_queries": [f"{category}.{name}" for category, name in self._flat_cache]
         }
 
-    def usage_report(self) -> Dict[str, Any]:
-        """Get current session usage report"""
+    def usage_report(self, top_n: Optional[int] = None) -> Dict[str, Any]:
+        """Get current session usage report (optionally only the top_n queries)"""
+        _, _, daily_usage, query_usage = self._merged_usage()
         return {
-            "daily_usage": self._daily_usage,
-            "query_usage": dict(sorted(self._query_usage.items(), key=lambda x: x[1], reverse=True)),
-            "total_unique_queries": len(self._query_usage)
+            "daily_usage": daily_usage,
+            "query_usage": {
+                f"{category}.{name}": count
+                for (category, name), count in query_usage.most_common(top_n)
+            },
+            "total_unique_queries": len(query_usage)
         }
 
     def recommend_preload(self, top_n: int = 5) -> List[str]:
         """Suggest top categories based on query usage"""
-        sorted_queries = sorted(self._query_usage.items(), key=lambda x: x[1], reverse=True)
-        top_queries = sorted_queries[:top_n]
-        categories = {q.split('.')[0] for q, _ in top_queries}
+        # most_common(n) is a partial heap selection, not a full sort
+        top_queries = self._merged_usage()[3].most_common(top_n)
+        categories = {category for (category, _), _ in top_queries}
         logger.info(f"Recommended categories to preload: {categories}")
         return list(categories)
 
@@ -357,12 +498,14 @@ class QueryManager:
 
     def export_usage_csv(self, file_path: str = "query_usage_export.csv"):
         """Export current session usage data to CSV"""
-        with open(file_path, mode='w', newline='') as csv_file:
+        rows = [
+            (f"{category}.{name}", count, category)
+            for (category, name), count in self._merged_usage()[3].most_common()
+        ]
+        with open(file_path, mode='w', newline='', buffering=1 << 20) as csv_file:
             writer = csv.writer(csv_file)
             writer.writerow(["Query", "Usage Count", "Category"])
-            for query, count in sorted(self._query_usage.items(), key=lambda x: x[1], reverse=True):
-                category = query.split('.')[0]
-                writer.writerow([query, count, category])
+            writer.writerows(rows)
         logger.info(f"Usage data exported to {file_path}")
 
 # Global query manager instance (without database logging by default)